@@ -1,238 +1,478 @@
-import json
-import os
-from datetime import datetime
-
-class DataManager:
-    """
-    Manages the storage and retrieval of application data, including
-    system metrics logs and LLM recommendations.
-    """
-    def __init__(self, base_data_dir: str = "app_data"):
-        """
-        Initializes the DataManager.
-        :param base_data_dir: The base directory where all application data will be stored.
-        """
-        self.base_data_dir = base_data_dir
-        self.log_dir = os.path.join(self.base_data_dir, "logs")
-        self.recommendations_dir = os.path.join(self.base_data_dir, "recommendations")
-        self.knowledge_base_dir = os.path.join(self.base_data_dir, "knowledge_base") # For future RAG source data
-
-        # Ensure directories exist
-        os.makedirs(self.log_dir, exist_ok=True)
-        os.makedirs(self.recommendations_dir, exist_ok=True)
-        os.makedirs(self.knowledge_base_dir, exist_ok=True)
-
-        self.log_file = os.path.join(self.log_dir, "system_metrics.jsonl") # JSON Lines for easy appending
-
-    def log_metrics(self, metrics: dict, context: dict = None):
-        """
-        Logs system metrics to a JSON Lines file.
-        :param metrics: A dictionary of system metrics.
-        :param context: Optional additional context (e.g., current recommendation ID).
-        """
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "metrics": metrics
-        }
-        if context:
-            log_entry.update(context)
-
-        try:
-            with open(self.log_file, 'a') as f:
-                f.write(json.dumps(log_entry) + '\n')
-            # print(f"Metrics logged to {self.log_file}") # Uncomment for verbose logging
-        except Exception as e:
-            print(f"Error logging metrics: {e}")
-
-    def save_recommendation(self, recommendation_text: str, current_metrics: dict, user_goal: str, algorithm: str) -> str:
-        """
-        Saves an LLM recommendation to a JSON file and returns its unique ID.
-        :param recommendation_text: The full text of the LLM's recommendation.
-        :param current_metrics: The system metrics at the time the recommendation was made.
-        :param user_goal: The user's stated goal for the recommendation.
-        :param algorithm: The mining algorithm specified.
-        :return: The unique ID of the saved recommendation.
-        """
-        rec_id = datetime.now().strftime("%Y%m%d%H%M%S") # Unique ID based on timestamp
-        rec_file_path = os.path.join(self.recommendations_dir, f"recommendation_{rec_id}.json")
-        
-        rec_data = {
-            "id": rec_id,
-            "timestamp": datetime.now().isoformat(),
-            "user_goal": user_goal,
-            "mining_algorithm": algorithm,
-            "system_snapshot_at_recommendation": current_metrics,
-            "llm_recommendation_text": recommendation_text,
-            "applied_status": "PENDING_USER_APPLY", # Initial status
-            "actual_performance_after_apply": {} # To be filled later
-        }
-        
-        try:
-            with open(rec_file_path, 'w') as f:
-                json.dump(rec_data, f, indent=4)
-            print(f"Recommendation saved to {rec_file_path}")
-            return rec_id
-        except Exception as e:
-            print(f"Error saving recommendation: {e}")
-            return "ERROR"
-
-    def update_recommendation_status(self, rec_id: str, status: str, actual_metrics: dict = None, notes: str = ""):
-        """
-        Updates the status and actual performance of a saved recommendation.
-        :param rec_id: The ID of the recommendation to update.
-        :param status: The new status (e.g., "APPLIED", "FAILED", "REVERTED", "CANCELLED").
-        :param actual_metrics: Optional dictionary of actual metrics after applying settings.
-        :param notes: Optional notes from the user about the outcome.
-        """
-        rec_file_path = os.path.join(self.recommendations_dir, f"recommendation_{rec_id}.json")
-        if not os.path.exists(rec_file_path):
-            print(f"Error: Recommendation ID {rec_id} not found at {rec_file_path}.")
-            return
-
-        try:
-            with open(rec_file_path, 'r+') as f:
-                data = json.load(f)
-                data["applied_status"] = status
-                if actual_metrics:
-                    data["actual_performance_after_apply"] = actual_metrics
-                if notes:
-                    data["user_notes"] = notes
-                data["last_updated"] = datetime.now().isoformat()
-                
-                f.seek(0) # Rewind to beginning
-                json.dump(data, f, indent=4)
-                f.truncate() # Trim any leftover content
-            print(f"Recommendation {rec_id} status updated to {status}.")
-        except Exception as e:
-            print(f"Error updating recommendation {rec_id}: {e}")
-
-    def load_recommendation(self, rec_id: str) -> dict or None:
-        """
-        Loads a specific recommendation by its ID.
-        :param rec_id: The ID of the recommendation to load.
-        :return: The recommendation dictionary or None if not found/error.
-        """
-        rec_file_path = os.path.join(self.recommendations_dir, f"recommendation_{rec_id}.json")
-        if os.path.exists(rec_file_path):
-            try:
-                with open(rec_file_path, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON for recommendation {rec_id}: {e}")
-                return None
-            except Exception as e:
-                print(f"Error loading recommendation {rec_id}: {e}")
-                return None
-        return None
-
-    def load_all_recommendations(self) -> list:
-        """
-        Loads all saved recommendations.
-        :return: A list of recommendation dictionaries.
-        """
-        recommendations = []
-        for filename in os.listdir(self.recommendations_dir):
-            if filename.startswith("recommendation_") and filename.endswith(".json"):
-                rec_id = filename.replace("recommendation_", "").replace(".json", "")
-                rec = self.load_recommendation(rec_id)
-                if rec:
-                    recommendations.append(rec)
-        # Sort by timestamp (most recent first)
-        recommendations.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        return recommendations
-
-    # --- Methods for future RAG / Knowledge Base ---
-    def add_knowledge_chunk(self, content: str, source_info: dict):
-        """
-        Simulates adding a text chunk to a knowledge base directory.
-        In a full RAG setup, this would embed and add to a vector DB.
-        For simplicity, we'll save as text files for now.
-        """
-        filename = os.path.join(self.knowledge_base_dir, f"kb_chunk_{datetime.now().strftime('%Y%m%d%H%M%S%f')}.json")
-        chunk_data = {
-            "content": content,
-            "source": source_info,
-            "timestamp": datetime.now().isoformat()
-        }
-        try:
-            with open(filename, 'w') as f:
-                json.dump(chunk_data, f, indent=4)
-            print(f"Knowledge chunk saved: {filename}")
-        except Exception as e:
-            print(f"Error saving knowledge chunk: {e}")
-
-    def get_knowledge_chunks(self) -> list:
-        """Retrieves all knowledge chunks (for LLM context assembly if not using a vector DB)."""
-        chunks = []
-        for filename in os.listdir(self.knowledge_base_dir):
-            if filename.startswith("kb_chunk_") and filename.endswith(".json"):
-                try:
-                    with open(os.path.join(self.knowledge_base_dir, filename), 'r') as f:
-                        chunks.append(json.load(f))
-                except json.JSONDecodeError as e:
-                    print(f"Warning: Could not decode knowledge chunk {filename}: {e}, skipping.")
-                except Exception as e:
-                    print(f"Error loading knowledge chunk {filename}: {e}, skipping.")
-        return chunks
-
-# Example Usage (for independent testing)
-if __name__ == "__main__":
-    # Create a dummy config for testing DataManager
-    dummy_config = {"app_data_dir": "test_app_data"}
-    dm = DataManager(base_data_dir=dummy_config["app_data_dir"])
-
-    # Clean up previous test data
-    import shutil
-    if os.path.exists(dummy_config["app_data_dir"]):
-        shutil.rmtree(dummy_config["app_data_dir"])
-        os.makedirs(os.path.join(dummy_config["app_data_dir"], "logs"), exist_ok=True)
-        os.makedirs(os.path.join(dummy_config["app_data_dir"], "recommendations"), exist_ok=True)
-        os.makedirs(os.path.join(dummy_config["app_data_dir"], "knowledge_base"), exist_ok=True)
-
-    print("Testing DataManager...")
-    
-    # Mock system metrics
-    mock_metrics = {
-        "gpu": {"temp_celsius": 65, "power_draw_watts": 200, "hash_rate_mhps": 50},
-        "cpu": {"temperature_celsius": 45, "usage_percent": 15},
-        "ram": {"total_gb": 16, "used_gb": 8, "usage_percent": 50}
-    }
-
-    # Log some metrics
-    dm.log_metrics(mock_metrics, context={"test_context": "initial_state"})
-    time.sleep(1)
-    dm.log_metrics(mock_metrics)
-
-    # Save a mock recommendation
-    mock_rec_text = "Core Clock: +100MHz, Memory Clock: +1200MHz, Power Limit: 70%, Fan: 70%. Expect 60MH/s at 120W."
-    rec_id = dm.save_recommendation(mock_rec_text, mock_metrics, "Maximize efficiency", "Ethash")
-    print(f"Saved recommendation with ID: {rec_id}")
-    
-    # Simulate user applying settings and getting new metrics
-    time.sleep(2) # Simulate time passing
-    mock_new_metrics = {
-        "gpu": {"temp_celsius": 68, "power_draw_watts": 122, "hash_rate_mhps": 60.5},
-        "cpu": {"temperature_celsius": 46, "usage_percent": 20},
-        "ram": {"total_gb": 16, "used_gb": 8, "usage_percent": 50}
-    }
-    dm.update_recommendation_status(rec_id, "APPLIED", mock_new_metrics, "Stable and efficient!")
-
-    # Load and print the updated recommendation
-    loaded_rec = dm.load_recommendation(rec_id)
-    print("\nLoaded Recommendation:")
-    print(json.dumps(loaded_rec, indent=4))
-
-    # Add a knowledge chunk
-    dm.add_knowledge_chunk(
-        "RTX 3070 often undervolts well. Check junction temps for stability.",
-        {"source": "online_guide", "url": "example.com/guide"}
-    )
-    print("\nKnowledge chunks:")
-    for chunk in dm.get_knowledge_chunks():
-        print(f"- {chunk['content']} (Source: {chunk['source'].get('source', 'N/A')})")
-
-    # Load all recommendations
-    all_recs = dm.load_all_recommendations()
-    print(f"\nTotal recommendations loaded: {len(all_recs)}")
-    # For cleanup
-    # shutil.rmtree(dummy_config["app_data_dir"])
+import atexit
+import logging
+import os
+import time
+from datetime import datetime
+
+import orjson # Rust-backed JSON; much faster than stdlib json for our small/medium dicts
+
+# pyarrow is optional: the Parquet training-dataset export is unavailable without it
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class DataManager:
+    """
+    Manages the storage and retrieval of application data, including
+    system metrics logs and LLM recommendations.
+    """
+    def __init__(self, base_data_dir: str = "app_data"):
+        """
+        Initializes the DataManager.
+        :param base_data_dir: The base directory where all application data will be stored.
+        """
+        self.base_data_dir = base_data_dir
+        self.log_dir = os.path.join(self.base_data_dir, "logs")
+        self.recommendations_dir = os.path.join(self.base_data_dir, "recommendations")
+        self.knowledge_base_dir = os.path.join(self.base_data_dir, "knowledge_base") # For future RAG source data
+
+        # Ensure directories exist
+        os.makedirs(self.log_dir, exist_ok=True)
+        os.makedirs(self.recommendations_dir, exist_ok=True)
+        os.makedirs(self.knowledge_base_dir, exist_ok=True)
+
+        self.log_file = os.path.join(self.log_dir, "system_metrics.jsonl") # JSON Lines for easy appending
+
+        # Buffer log entries in memory and flush in batches, so each metrics tick
+        # doesn't pay a full open/write/close cycle of its own.
+        self._log_buffer = []
+        self._log_buffer_bytes = 0
+        self._log_flush_threshold_bytes = 64 * 1024
+        self._log_flush_interval_seconds = 60 # Age bound: at 10s/sample the size threshold alone could sit for hours
+        self._last_log_flush = time.monotonic()
+        self._log_fh = open(self.log_file, 'ab', buffering=1024 * 1024)
+        atexit.register(self.flush_metrics_log) # Don't lose buffered entries on exit
+
+        # Single append-only JSONL stores instead of one file per record: N records
+        # cost one sequential read instead of N opens. Updates append a new revision
+        # with the same id (latest-wins); compact() drops superseded revisions.
+        self.rec_store_file = os.path.join(self.recommendations_dir, "recommendations.jsonl")
+        self.knowledge_base_file = os.path.join(self.knowledge_base_dir, "knowledge_base.jsonl")
+
+        self._rec_index = {} # rec_id -> byte offset of the latest revision in the store
+        self._rec_cache = {} # rec_id -> parsed latest revision
+        self._rec_summaries = {} # rec_id -> the handful of fields the list view shows
+        self._migrate_legacy_files()
+        self._build_rec_index()
+
+    def _migrate_legacy_files(self):
+        """
+        One-time import of the old one-file-per-record layout (recommendation_*.json,
+        kb_chunk_*.json) into the JSONL stores. Legacy files are removed once copied.
+        """
+        for directory, prefix, store in (
+            (self.recommendations_dir, "recommendation_", self.rec_store_file),
+            (self.knowledge_base_dir, "kb_chunk_", self.knowledge_base_file),
+        ):
+            with os.scandir(directory) as entries:
+                legacy = [e.path for e in entries
+                          if e.name.startswith(prefix) and e.name.endswith(".json")]
+            if not legacy:
+                continue
+            try:
+                with open(store, 'ab') as f:
+                    for path in sorted(legacy):
+                        with open(path, 'rb') as old:
+                            record = orjson.loads(old.read())
+                        f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+                        os.remove(path)
+                logger.info("Migrated %d legacy files into %s", len(legacy), store)
+            except Exception as e:
+                logger.exception("Error migrating legacy files from %s", directory)
+
+    # The columns _view_past_recommendations shows; everything else (snapshots,
+    # full recommendation text) stays on disk until the details window asks for it
+    _SUMMARY_FIELDS = ("id", "timestamp", "timestamp_display", "user_goal",
+                       "mining_algorithm", "applied_status")
+
+    @classmethod
+    def _summarize(cls, rec: dict) -> dict:
+        """Extracts just the list-view fields from a full record."""
+        return {field: rec.get(field) for field in cls._SUMMARY_FIELDS}
+
+    def _build_rec_index(self):
+        """Scans the recommendation store once and records the byte offset of each record's latest revision."""
+        try:
+            with open(self.rec_store_file, 'rb') as f:
+                offset = 0
+                for line in f:
+                    if line.strip():
+                        try:
+                            rec = orjson.loads(line)
+                            rec_id = rec.get("id")
+                            if rec_id:
+                                self._rec_index[rec_id] = offset # Later revisions overwrite earlier offsets
+                                self._rec_summaries[rec_id] = self._summarize(rec)
+                        except orjson.JSONDecodeError:
+                            logger.warning("Skipping corrupt line at offset %d in %s", offset, self.rec_store_file)
+                    offset += len(line)
+        except FileNotFoundError:
+            pass # No store yet; first save will create it
+        except Exception as e:
+            logger.exception("Error indexing recommendation store")
+
+    def log_metrics(self, metrics: dict, context: dict = None):
+        """
+        Logs system metrics to a JSON Lines file.
+        :param metrics: A dictionary of system metrics.
+        :param context: Optional additional context (e.g., current recommendation ID).
+        """
+        log_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "metrics": metrics
+        }
+        if context:
+            log_entry.update(context)
+
+        try:
+            line = orjson.dumps(log_entry, option=orjson.OPT_APPEND_NEWLINE)
+            self._log_buffer.append(line)
+            self._log_buffer_bytes += len(line)
+            if (self._log_buffer_bytes >= self._log_flush_threshold_bytes
+                    or time.monotonic() - self._last_log_flush >= self._log_flush_interval_seconds):
+                self.flush_metrics_log()
+            logger.debug("Metrics buffered for %s", self.log_file)
+        except Exception as e:
+            logger.exception("Error logging metrics")
+
+    def flush_metrics_log(self):
+        """Writes any buffered metric log entries to disk in one batch."""
+        self._last_log_flush = time.monotonic()
+        if not self._log_buffer:
+            return
+        try:
+            self._log_fh.write(b''.join(self._log_buffer))
+            self._log_fh.flush()
+            self._log_buffer.clear()
+            self._log_buffer_bytes = 0
+        except Exception as e:
+            logger.exception("Error flushing metrics log")
+
+    def save_recommendation(self, recommendation_text: str, current_metrics: dict, user_goal: str, algorithm: str) -> str:
+        """
+        Saves an LLM recommendation to a JSON file and returns its unique ID.
+        :param recommendation_text: The full text of the LLM's recommendation.
+        :param current_metrics: The system metrics at the time the recommendation was made.
+        :param user_goal: The user's stated goal for the recommendation.
+        :param algorithm: The mining algorithm specified.
+        :return: The unique ID of the saved recommendation.
+        """
+        now = datetime.now() # One clock read reused for both the ID and the timestamp
+        rec_id = str(time.time_ns()) # Nanosecond ID; second-resolution strftime IDs collide under rapid saves
+        # Callers may hand us a read-only MappingProxyType view; materialize a plain
+        # dict at the serialization boundary since orjson only handles real dicts.
+        current_metrics = dict(current_metrics)
+
+        rec_data = {
+            "id": rec_id,
+            "timestamp": now.isoformat(),
+            # Pre-formatted for the past-recs list, which would otherwise
+            # fromisoformat + strftime every row on each dialog rebuild
+            "timestamp_display": now.strftime('%Y-%m-%d %H:%M'),
+            "user_goal": user_goal,
+            "mining_algorithm": algorithm,
+            "system_snapshot_at_recommendation": current_metrics,
+            # Pre-rendered for the details view, so the UI never pretty-prints on demand
+            "system_snapshot_pretty": orjson.dumps(current_metrics, option=orjson.OPT_INDENT_2).decode(),
+            "llm_recommendation_text": recommendation_text,
+            "applied_status": "PENDING_USER_APPLY", # Initial status
+            "actual_performance_after_apply": {} # To be filled later
+        }
+        
+        try:
+            self._append_rec_revision(rec_data)
+            logger.info("Recommendation %s saved to %s", rec_id, self.rec_store_file)
+            return rec_id
+        except Exception as e:
+            logger.exception("Error saving recommendation")
+            return "ERROR"
+
+    def _append_rec_revision(self, rec_data: dict):
+        """Appends one record revision to the store and updates the index and cache."""
+        rec_id = rec_data["id"]
+        with open(self.rec_store_file, 'ab') as f:
+            offset = f.tell()
+            f.write(orjson.dumps(rec_data, option=orjson.OPT_APPEND_NEWLINE))
+        self._rec_index[rec_id] = offset
+        self._rec_cache[rec_id] = rec_data
+        self._rec_summaries[rec_id] = self._summarize(rec_data)
+
+    def update_recommendation_status(self, rec_id: str, status: str, actual_metrics: dict = None, notes: str = ""):
+        """
+        Updates the status and actual performance of a saved recommendation.
+        :param rec_id: The ID of the recommendation to update.
+        :param status: The new status (e.g., "APPLIED", "FAILED", "REVERTED", "CANCELLED").
+        :param actual_metrics: Optional dictionary of actual metrics after applying settings.
+        :param notes: Optional notes from the user about the outcome.
+        """
+        data = self.load_recommendation(rec_id)
+        if data is None:
+            logger.error("Recommendation ID %s not found in %s.", rec_id, self.rec_store_file)
+            return
+
+        try:
+            data["applied_status"] = status
+            if actual_metrics:
+                data["actual_performance_after_apply"] = actual_metrics
+            if notes:
+                data["user_notes"] = notes
+            data["last_updated"] = datetime.now().isoformat()
+
+            # Append a new revision instead of rewriting in place; the index points
+            # at the latest revision and compact() reclaims the superseded ones.
+            self._append_rec_revision(data)
+            logger.info("Recommendation %s status updated to %s.", rec_id, status)
+        except Exception as e:
+            logger.exception("Error updating recommendation %s", rec_id)
+
+    def load_recommendation(self, rec_id: str) -> dict or None:
+        """
+        Loads a specific recommendation by its ID.
+        :param rec_id: The ID of the recommendation to load.
+        :return: The recommendation dictionary or None if not found/error.
+        """
+        cached = self._rec_cache.get(rec_id)
+        if cached is not None:
+            return cached
+
+        offset = self._rec_index.get(rec_id)
+        if offset is None:
+            return None
+        try:
+            with open(self.rec_store_file, 'rb') as f:
+                f.seek(offset)
+                rec = orjson.loads(f.readline())
+            self._rec_cache[rec_id] = rec
+            return rec
+        except orjson.JSONDecodeError as e:
+            logger.exception("Error decoding JSON for recommendation %s", rec_id)
+            return None
+        except Exception as e:
+            logger.exception("Error loading recommendation %s", rec_id)
+            return None
+
+    def export_recommendation_pretty(self, rec_id: str, export_path: str) -> bool:
+        """
+        Writes an indented, human-readable copy of a recommendation for sharing or
+        inspection. The stores themselves stay compact; pretty-printing is only
+        paid here, on explicit export.
+        :param rec_id: The ID of the recommendation to export.
+        :param export_path: Destination file path.
+        :return: True on success, False otherwise.
+        """
+        rec = self.load_recommendation(rec_id)
+        if rec is None:
+            logger.error("Cannot export recommendation %s: not found.", rec_id)
+            return False
+        try:
+            with open(export_path, 'wb') as f:
+                f.write(orjson.dumps(rec, option=orjson.OPT_INDENT_2))
+            logger.info("Recommendation %s exported to %s", rec_id, export_path)
+            return True
+        except Exception as e:
+            logger.exception("Error exporting recommendation %s", rec_id)
+            return False
+
+    def load_recommendation_index(self) -> list:
+        """
+        Returns lightweight summaries (list-view fields only) of every saved
+        recommendation, most recent first. Unlike load_all_recommendations this
+        never touches disk: summaries are maintained in memory alongside the
+        offset index, so listing N records costs O(N) small dicts rather than
+        re-reading N full records with their snapshots and recommendation text.
+        :return: A list of summary dictionaries.
+        """
+        summaries = list(self._rec_summaries.values())
+        summaries.sort(key=lambda x: x.get('timestamp') or '', reverse=True)
+        return summaries
+
+    def load_all_recommendations(self) -> list:
+        """
+        Loads all saved recommendations (latest revision of each).
+        :return: A list of recommendation dictionaries.
+        """
+        recommendations = [rec for rec in (self.load_recommendation(rec_id) for rec_id in self._rec_index)
+                           if rec is not None]
+        # Sort by timestamp (most recent first)
+        recommendations.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+        return recommendations
+
+    def export_training_dataset_parquet(self, export_path: str) -> bool:
+        """
+        Writes the curated recommendation outcomes as a columnar Parquet dataset
+        for LoRA fine-tuning. Training frameworks memory-map Parquet and read it
+        zero-copy, where a JSONL dataset is re-parsed line by line every epoch;
+        the low-cardinality string columns are dictionary-encoded so filtering
+        by GPU, algorithm or outcome stays a cheap columnar scan.
+        :param export_path: Destination .parquet file path.
+        :return: True on success, False otherwise.
+        """
+        if not PYARROW_AVAILABLE:
+            logger.error("pyarrow is not installed; cannot export a Parquet dataset.")
+            return False
+        records = self.load_all_recommendations()
+        if not records:
+            logger.warning("No recommendations to export.")
+            return False
+        try:
+            columns = {name: [] for name in (
+                "id", "timestamp", "gpu_model", "algorithm", "user_goal",
+                "outcome", "system_snapshot", "recommendation", "actual_performance", "user_notes"
+            )}
+            for rec in records:
+                snapshot = rec.get("system_snapshot_at_recommendation", {})
+                columns["id"].append(rec.get("id", ""))
+                columns["timestamp"].append(rec.get("timestamp", ""))
+                columns["gpu_model"].append(str(snapshot.get("gpu", {}).get("model", "")))
+                columns["algorithm"].append(rec.get("mining_algorithm", ""))
+                columns["user_goal"].append(rec.get("user_goal", ""))
+                columns["outcome"].append(rec.get("applied_status", ""))
+                columns["system_snapshot"].append(
+                    rec.get("system_snapshot_pretty") or orjson.dumps(snapshot).decode())
+                columns["recommendation"].append(rec.get("llm_recommendation_text", ""))
+                columns["actual_performance"].append(
+                    orjson.dumps(rec.get("actual_performance_after_apply", {})).decode())
+                columns["user_notes"].append(rec.get("user_notes", ""))
+
+            table = pa.table({name: pa.array(values, type=pa.string())
+                              for name, values in columns.items()})
+            for name in ("gpu_model", "algorithm", "outcome"): # Few distinct values each
+                index = table.schema.get_field_index(name)
+                table = table.set_column(index, name, table.column(name).dictionary_encode())
+            pq.write_table(table, export_path)
+            logger.info("Exported %d records to Parquet dataset %s", len(records), export_path)
+            return True
+        except Exception as e:
+            logger.exception("Error exporting Parquet dataset to %s", export_path)
+            return False
+
+    def compact_recommendations(self):
+        """
+        Rewrites the recommendation store keeping only the latest revision of each
+        record, reclaiming space left by superseded update revisions.
+        """
+        try:
+            records = self.load_all_recommendations()
+            tmp_path = self.rec_store_file + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                for rec in reversed(records): # Oldest first, matching append order
+                    f.write(orjson.dumps(rec, option=orjson.OPT_APPEND_NEWLINE))
+                f.flush()
+                os.fsync(f.fileno()) # Make sure the new store is durable before it replaces the old one
+            os.replace(tmp_path, self.rec_store_file) # Atomic rename: a crash leaves old or new, never a torn file
+            self._rec_index.clear()
+            self._rec_cache.clear()
+            self._rec_summaries.clear()
+            self._build_rec_index()
+            logger.info("Recommendation store compacted: %d records kept.", len(records))
+        except Exception as e:
+            logger.exception("Error compacting recommendation store")
+
+    # --- Methods for future RAG / Knowledge Base ---
+    def add_knowledge_chunk(self, content: str, source_info: dict):
+        """
+        Simulates adding a text chunk to a knowledge base directory.
+        In a full RAG setup, this would embed and add to a vector DB.
+        For simplicity, we'll save as text files for now.
+        """
+        chunk_data = {
+            "content": content,
+            "source": source_info,
+            "timestamp": datetime.now().isoformat()
+        }
+        try:
+            with open(self.knowledge_base_file, 'ab') as f:
+                f.write(orjson.dumps(chunk_data, option=orjson.OPT_APPEND_NEWLINE))
+            logger.info("Knowledge chunk appended to %s", self.knowledge_base_file)
+        except Exception as e:
+            logger.exception("Error saving knowledge chunk")
+
+    def iter_knowledge_chunks(self):
+        """
+        Lazily yields knowledge chunks one at a time (for LLM context assembly if not
+        using a vector DB). Streaming keeps memory flat however large the KB grows.
+        """
+        try:
+            with open(self.knowledge_base_file, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield orjson.loads(line)
+                    except orjson.JSONDecodeError as e:
+                        logger.warning("Could not decode knowledge chunk line: %s, skipping.", e)
+        except FileNotFoundError:
+            pass # No knowledge base yet
+        except Exception as e:
+            logger.exception("Error loading knowledge chunks")
+
+    def get_knowledge_chunks(self) -> list:
+        """Retrieves all knowledge chunks as a list. Prefer iter_knowledge_chunks for large KBs."""
+        return list(self.iter_knowledge_chunks())
+
+# Example Usage (for independent testing)
+if __name__ == "__main__":
+    # Create a dummy config for testing DataManager
+    dummy_config = {"app_data_dir": "test_app_data"}
+    dm = DataManager(base_data_dir=dummy_config["app_data_dir"])
+
+    # Clean up previous test data
+    import shutil
+    if os.path.exists(dummy_config["app_data_dir"]):
+        shutil.rmtree(dummy_config["app_data_dir"])
+        os.makedirs(os.path.join(dummy_config["app_data_dir"], "logs"), exist_ok=True)
+        os.makedirs(os.path.join(dummy_config["app_data_dir"], "recommendations"), exist_ok=True)
+        os.makedirs(os.path.join(dummy_config["app_data_dir"], "knowledge_base"), exist_ok=True)
+
+    print("Testing DataManager...")
+    
+    # Mock system metrics
+    mock_metrics = {
+        "gpu": {"temp_celsius": 65, "power_draw_watts": 200, "hash_rate_mhps": 50},
+        "cpu": {"temperature_celsius": 45, "usage_percent": 15},
+        "ram": {"total_gb": 16, "used_gb": 8, "usage_percent": 50}
+    }
+
+    # Log some metrics
+    dm.log_metrics(mock_metrics, context={"test_context": "initial_state"})
+    time.sleep(1)
+    dm.log_metrics(mock_metrics)
+
+    # Save a mock recommendation
+    mock_rec_text = "Core Clock: +100MHz, Memory Clock: +1200MHz, Power Limit: 70%, Fan: 70%. Expect 60MH/s at 120W."
+    rec_id = dm.save_recommendation(mock_rec_text, mock_metrics, "Maximize efficiency", "Ethash")
+    print(f"Saved recommendation with ID: {rec_id}")
+    
+    # Simulate user applying settings and getting new metrics
+    time.sleep(2) # Simulate time passing
+    mock_new_metrics = {
+        "gpu": {"temp_celsius": 68, "power_draw_watts": 122, "hash_rate_mhps": 60.5},
+        "cpu": {"temperature_celsius": 46, "usage_percent": 20},
+        "ram": {"total_gb": 16, "used_gb": 8, "usage_percent": 50}
+    }
+    dm.update_recommendation_status(rec_id, "APPLIED", mock_new_metrics, "Stable and efficient!")
+
+    # Load and print the updated recommendation
+    loaded_rec = dm.load_recommendation(rec_id)
+    print("\nLoaded Recommendation:")
+    print(orjson.dumps(loaded_rec, option=orjson.OPT_INDENT_2).decode())
+
+    # Add a knowledge chunk
+    dm.add_knowledge_chunk(
+        "RTX 3070 often undervolts well. Check junction temps for stability.",
+        {"source": "online_guide", "url": "example.com/guide"}
+    )
+    print("\nKnowledge chunks:")
+    for chunk in dm.get_knowledge_chunks():
+        print(f"- {chunk['content']} (Source: {chunk['source'].get('source', 'N/A')})")
+
+    # Load all recommendations
+    all_recs = dm.load_all_recommendations()
+    print(f"\nTotal recommendations loaded: {len(all_recs)}")
+    # For cleanup
+    # shutil.rmtree(dummy_config["app_data_dir"])
@@ -1,147 +1,321 @@
-import ollama # For Ollama
-# import lmstudio as lms # Uncomment if using LM Studio instead
-import json
-
-class LLMInterface:
-    """
-    Handles interaction with a local Large Language Model (LLM) for generating
-    overclocking recommendations.
-    Assumes Ollama is running and the specified model is pulled.
-    """
-    def __init__(self, config: dict):
-        """
-        Initializes the LLMInterface.
-        :param config: A dictionary containing LLM configuration details (model name, base URL).
-        """
-        self.config = config
-        self.llm_model = config.get("llm_model_name", "llama3")
-        self.ollama_base_url = config.get("ollama_base_url", "http://localhost:11434")
-
-        # You can technically instantiate the ollama client explicitly if needed:
-        # self.ollama_client = ollama.Client(host=self.ollama_base_url)
-        # For LM Studio, it would be:
-        # self.lmstudio_client = lms.Client(base_url=self.lmstudio_base_url)
-        print(f"LLMInterface initialized for model: {self.llm_model} via Ollama at {self.ollama_base_url}")
-
-    def get_overclock_recommendations(self, system_summary: str, current_mining_algorithm: str, user_goal: str) -> str:
-        """
-        Sends a detailed prompt to the LLM to get overclocking recommendations.
-        :param system_summary: A string containing the system's static and real-time metrics.
-        :param current_mining_algorithm: The cryptocurrency mining algorithm being used.
-        :param user_goal: The user's primary goal for optimization (e.g., "maximize efficiency").
-        :return: A string containing the LLM's recommendation, or an error message.
-        """
-        prompt = f"""
-You are an expert GPU overclocking and crypto mining advisor. Your goal is to provide safe, efficient, and detailed overclocking recommendations for a user's specific GPU and mining setup.
-
-Here is the current system summary and real-time telemetry:
-{system_summary}
-
-The user's primary goal for overclocking is: '{user_goal}'.
-The current crypto mining algorithm they are using (or plan to use) is: '{current_mining_algorithm}'.
-
-Based on this information and your extensive knowledge of GPU performance, mining algorithms, and hardware stability, provide the following sections:
-
-1.  **Recommended Overclock Settings:**
-    * **Core Clock (MHz):** Specify either a fixed clock (e.g., 1800) or an offset (e.g., +150). Prefer fixed clocks for better efficiency if possible for the GPU/algorithm.
-    * **Memory Clock (MHz):** Specify an offset (e.g., +1200).
-    * **Power Limit (%):** Percentage of the maximum allowed TDP (e.g., 70%).
-    * **Fan Speed (% or Curve Description):** A target percentage (e.g., 70%) or a brief description of a desired fan curve (e.g., "aggressive to maintain 60C").
-2.  **Expected Outcomes:**
-    * **Estimated Hash Rate:** (e.g., XX MH/s, YY Sol/s, ZZ H/s - provide a realistic estimate based on common benchmarks for this GPU/algorithm/settings if possible).
-    * **Estimated Power Draw:** (e.g., WW watts).
-    * **Estimated Efficiency:** (e.g., EE J/MH, or Watts/Sol - calculate if possible from estimated hash rate and power draw).
-    * **Expected Temperature:** (e.g., TT°C for GPU core, and if applicable, junction/hotspot temp).
-3.  **Reasoning:**
-    * Explain *why* these specific values are chosen, referencing the system's current state, the mining algorithm, and common community best practices or scientific principles.
-    * Discuss the trade-offs (e.g., hash rate vs. power efficiency vs. heat, stability).
-4.  **Potential Risks & Precautions:**
-    * What are the risks of applying these settings (e.g., instability, crashes, reduced hardware lifespan, invalid shares)?
-    * What precautions should the user take (e.g., incremental changes, continuous monitoring, thorough testing, ensuring adequate PSU)?
-5.  **Step-by-Step Instructions:**
-    * Provide clear, concise instructions on how to apply these settings using common tools.
-    * **For Windows users, focus on MSI Afterburner.**
-    * **For Linux users (NVIDIA), focus on `nvidia-smi` commands.**
-    * **For Linux users (AMD), focus on `amdgpu-clocks` or `roc_smi` (if applicable and safe) or other common Linux tools.**
-    * Remind the user that direct software control might require specific tools or administrator privileges.
-
-Format your output clearly with bold headings. Be precise with numerical recommendations. If you cannot provide a specific value, explain why. Prioritize safety and stability.
-"""
-        # --- LLM API Call ---
-        try:
-            print(f"\n[LLM] Sending prompt to LLM for recommendations ({self.llm_model})...")
-            # Using ollama.generate for simplicity to get a single response string
-            # For more advanced conversational flows, ollama.chat can be used
-            response = ollama.generate(
-                model=self.llm_model,
-                prompt=prompt,
-                stream=False, # Set to True if you want to process text as it's generated
-                options={
-                    "temperature": 0.5, # Controls randomness: lower for more factual, higher for more creative
-                    "num_ctx": 4096, # Context window size. Adjust based on your model and prompt length
-                    "top_k": 40,
-                    "top_p": 0.9,
-                    "num_gpu": -1 # Use all available GPU layers if model is GPU-accelerated
-                }
-            )
-            # Ollama's generate returns a dictionary, with the actual response in ['response']
-            return response.get('response', "LLM did not return a valid response.")
-
-        except Exception as e:
-            error_message = f"Error: Could not get recommendations from LLM. Details: {e}\n"
-            if "status code: 404" in str(e) and self.llm_model in str(e):
-                error_message += f"Please ensure the model '{self.llm_model}' is downloaded and available in your Ollama installation. Run `ollama pull {self.llm_model}` in your terminal."
-            else:
-                error_message += "Please ensure your Ollama server is running and accessible (e.g., at http://localhost:11434)."
-            
-            print(f"[LLM ERROR] {error_message}")
-            return error_message
-
-# Example Usage (for independent testing)
-if __name__ == "__main__":
-    mock_config = {
-        "llm_model_name": "llama3", # Make sure you have 'llama3' pulled in Ollama
-        "ollama_base_url": "http://localhost:11434"
-    }
-
-    llm_advisor = LLMInterface(mock_config)
-
-    # Mock system summary (replace with real data from SystemMonitor)
-    mock_system_summary = """
-    System Summary:
-    ---
-    GPU (Brand: NVIDIA):
-      Model: NVIDIA GeForce RTX 3070
-      Driver Version: 535.12.0
-      Total VRAM: 8192 MB
-      Current Temp: 65°C
-      Current Hot Spot Temp: 75°C
-      Current Power Draw: 220W
-      Current Core Clock: 1800MHz
-      Current Memory Clock: 7000MHz
-      Current Fan Speed: 60%
-      Current VRAM Used: 7800 MB
-
-    CPU:
-      Temperature: 50°C
-      Usage: 10%
-
-    RAM:
-      Total: 32 GB
-      Used: 10 GB (31%)
-
-    Operating System: Linux
-    """
-
-    mock_current_mining_algorithm = "Ethash" # Example: Ethereum Classic mining
-    mock_user_goal = "Maximize power efficiency while maintaining stability and extending GPU lifespan."
-
-    print("\nAttempting to get LLM recommendations (this might take a while)...")
-    recommendations = llm_advisor.get_overclock_recommendations(
-        mock_system_summary,
-        mock_current_mining_algorithm,
-        mock_user_goal
-    )
-    print("\n--- LLM Recommendations ---")
-    print(recommendations)
-    print("--------------------------")
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import ollama # For Ollama
+# import lmstudio as lms # Uncomment if using LM Studio instead
+import json
+
+# The static instruction block, built once at import and sent byte-identical on
+# every request via Ollama's `system` field. Keeping it stable (no per-call
+# interpolation) lets Ollama reuse the prefill KV cache for these ~800 tokens
+# across calls; only the short user prompt with the telemetry is re-processed.
+_SYSTEM_PROMPT = """
+You are an expert GPU overclocking and crypto mining advisor. Your goal is to provide safe, efficient, and detailed overclocking recommendations for a user's specific GPU and mining setup.
+
+Using the system summary and real-time telemetry given at the end of this prompt, and your extensive knowledge of GPU performance, mining algorithms, and hardware stability, provide the following sections:
+
+1.  **Recommended Overclock Settings:**
+    * **Core Clock (MHz):** Specify either a fixed clock (e.g., 1800) or an offset (e.g., +150). Prefer fixed clocks for better efficiency if possible for the GPU/algorithm.
+    * **Memory Clock (MHz):** Specify an offset (e.g., +1200).
+    * **Power Limit (%):** Percentage of the maximum allowed TDP (e.g., 70%).
+    * **Fan Speed (% or Curve Description):** A target percentage (e.g., 70%) or a brief description of a desired fan curve (e.g., "aggressive to maintain 60C").
+2.  **Expected Outcomes:**
+    * **Estimated Hash Rate:** (e.g., XX MH/s, YY Sol/s, ZZ H/s - provide a realistic estimate based on common benchmarks for this GPU/algorithm/settings if possible).
+    * **Estimated Power Draw:** (e.g., WW watts).
+    * **Estimated Efficiency:** (e.g., EE J/MH, or Watts/Sol - calculate if possible from estimated hash rate and power draw).
+    * **Expected Temperature:** (e.g., TT°C for GPU core, and if applicable, junction/hotspot temp).
+3.  **Reasoning:**
+    * Explain *why* these specific values are chosen, referencing the system's current state, the mining algorithm, and common community best practices or scientific principles.
+    * Discuss the trade-offs (e.g., hash rate vs. power efficiency vs. heat, stability).
+4.  **Potential Risks & Precautions:**
+    * What are the risks of applying these settings (e.g., instability, crashes, reduced hardware lifespan, invalid shares)?
+    * What precautions should the user take (e.g., incremental changes, continuous monitoring, thorough testing, ensuring adequate PSU)?
+5.  **Step-by-Step Instructions:**
+    * Provide clear, concise instructions on how to apply these settings using common tools.
+    * **For Windows users, focus on MSI Afterburner.**
+    * **For Linux users (NVIDIA), focus on `nvidia-smi` commands.**
+    * **For Linux users (AMD), focus on `amdgpu-clocks` or `roc_smi` (if applicable and safe) or other common Linux tools.**
+    * Remind the user that direct software control might require specific tools or administrator privileges.
+
+Format your output clearly with bold headings. Be precise with numerical recommendations. If you cannot provide a specific value, explain why. Prioritize safety and stability.
+"""
+
+class LLMInterface:
+    """
+    Handles interaction with a local Large Language Model (LLM) for generating
+    overclocking recommendations.
+    Assumes Ollama is running and the specified model is pulled.
+    """
+    def __init__(self, config: dict):
+        """
+        Initializes the LLMInterface.
+        :param config: A dictionary containing LLM configuration details (model name, base URL).
+        """
+        self.config = config
+        self.llm_model = config.get("llm_model_name", "llama3:8b-instruct-q4_K_M")
+        self.ollama_base_url = config.get("ollama_base_url", "http://localhost:11434")
+        self.num_predict = config.get("llm_num_predict", 1024) # Bound response length; unbounded num_predict makes latency unpredictable
+        self.temperature = config.get("llm_temperature", 0.5)
+        self.keep_alive = config.get("ollama_keep_alive", "30m") # Keep the model resident in VRAM between requests
+        # "ollama" (default) or "llamacpp" for a llama-server instance, which
+        # gives direct control over batching, context size and prompt caching
+        self.backend = config.get("llm_backend", "ollama")
+        self.llamacpp_base_url = config.get("llamacpp_base_url", "http://localhost:8080")
+        self.max_ctx = 4096 # Context ceiling; tune_context_budget can raise/lower it to fit VRAM
+
+        # One persistent client so every request reuses the same HTTP connection
+        # (keep-alive) instead of re-establishing it per call.
+        # For LM Studio, it would be:
+        # self.lmstudio_client = lms.Client(base_url=self.lmstudio_base_url)
+        self.ollama_client = ollama.Client(host=self.ollama_base_url)
+
+        # On-disk cache of responses keyed by (system summary, algorithm, goal), so an
+        # identical request skips the multi-second inference entirely.
+        self.cache_dir = os.path.join(config.get("app_data_dir", "app_data"), "llm_cache")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        print(f"LLMInterface initialized for model: {self.llm_model} via Ollama at {self.ollama_base_url}")
+
+    def _response_cache_path(self, system_summary: str, current_mining_algorithm: str, user_goal: str) -> str:
+        """Derives the cache file path for a request triple via a fast blake2b digest."""
+        key = hashlib.blake2b(digest_size=16)
+        key.update(system_summary.encode())
+        key.update(b'\0')
+        key.update(current_mining_algorithm.encode())
+        key.update(b'\0')
+        key.update(user_goal.encode())
+        return os.path.join(self.cache_dir, f"{key.hexdigest()}.txt")
+
+    def warmup(self):
+        """
+        Issues a one-token generation so Ollama loads the model weights before the
+        first real request; the first button click then skips the cold-start cost.
+        """
+        try:
+            print(f"[LLM] Warming up model {self.llm_model}...")
+            self.ollama_client.generate(
+                model=self.llm_model,
+                prompt="ok",
+                system=_SYSTEM_PROMPT, # Also pre-fills the KV cache for the shared prefix
+                stream=False,
+                keep_alive=self.keep_alive,
+                options={"num_predict": 1}
+            )
+            print("[LLM] Model warmup complete.")
+        except Exception as e:
+            print(f"[LLM] Warmup skipped ({e}).")
+
+    def tune_context_budget(self, kv_budget_mb: int, layers: int = 32, hidden: int = 4096):
+        """
+        Caps the context length so the KV cache fits the VRAM left after the
+        model weights (see SystemMonitor.suggested_kv_budget_mb). Per-token KV
+        cost is 2 (K and V) x layers x hidden x 2 bytes fp16; the resulting
+        token count is rounded down to a power of two and clamped to [512, 8192].
+        :param kv_budget_mb: VRAM available for the KV cache, in MB.
+        :param layers: Transformer layer count of the served model.
+        :param hidden: Hidden dimension of the served model.
+        """
+        per_token_bytes = 2 * layers * hidden * 2
+        max_tokens = (kv_budget_mb * 1024 * 1024) // per_token_bytes
+        ctx = 512
+        while ctx * 2 <= max_tokens and ctx < 8192:
+            ctx *= 2
+        self.max_ctx = ctx
+        print(f"[LLM] Context ceiling tuned to {self.max_ctx} tokens for a {kv_budget_mb}MB KV budget.")
+
+    def _estimate_num_ctx(self, prompt: str, response_budget_tokens: int = 1024) -> int:
+        """
+        Sizes the KV cache to what the request actually needs instead of a fixed
+        4096: ~4 chars/token heuristic for the prompt plus a response budget,
+        rounded up to the next power of two and capped at the tuned ceiling.
+        """
+        needed = len(prompt) // 4 + response_budget_tokens
+        num_ctx = 512
+        while num_ctx < needed:
+            num_ctx *= 2
+        return min(num_ctx, self.max_ctx)
+
+    def _stream_llamacpp_fragments(self, prompt: str):
+        """
+        Streams completion fragments from a llama-server /completion endpoint.
+        cache_prompt keeps the server-side KV cache warm for the stable system
+        prefix, so only the changing telemetry tail re-enters prefill.
+        :param prompt: The dynamic (non-system) part of the prompt.
+        :return: A generator of response text fragments.
+        """
+        import urllib.request # Deferred: only the llamacpp backend needs it
+
+        payload = json.dumps({
+            "prompt": _SYSTEM_PROMPT + prompt,
+            "n_predict": self.num_predict,
+            "temperature": self.temperature,
+            "top_k": 40,
+            "top_p": 0.9,
+            "cache_prompt": True, # Reuse cached prefill tokens across requests
+            "stream": True,
+        }).encode()
+        request = urllib.request.Request(
+            f"{self.llamacpp_base_url}/completion",
+            data=payload,
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            for raw_line in response:
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith("data: "): # Server-sent events; skip keep-alives
+                    continue
+                part = json.loads(line[len("data: "):])
+                yield part.get("content", "")
+                if part.get("stop"):
+                    break
+
+    def get_overclock_recommendations(self, system_summary: str, current_mining_algorithm: str, user_goal: str) -> str:
+        """
+        Convenience wrapper that joins the streamed recommendation into one string.
+        :param system_summary: A string containing the system's static and real-time metrics.
+        :param current_mining_algorithm: The cryptocurrency mining algorithm being used.
+        :param user_goal: The user's primary goal for optimization (e.g., "maximize efficiency").
+        :return: A string containing the LLM's recommendation, or an error message.
+        """
+        return "".join(self.stream_overclock_recommendations(system_summary, current_mining_algorithm, user_goal))
+
+    def get_overclock_recommendations_batch(self, request_triples: list, max_concurrency: int = 4) -> list:
+        """
+        Resolves several (system_summary, algorithm, goal) requests at once, e.g.
+        when replaying historical snapshots to curate fine-tuning data. The
+        requests are issued concurrently so a server running with continuous
+        batching (llama-server --parallel N --cont-batching, or Ollama with
+        parallel request support) merges them into shared decode steps — each
+        weight load is then amortized across all sequences instead of being paid
+        per request on the memory-bound decode phase.
+        :param request_triples: A list of (system_summary, algorithm, goal) tuples.
+        :param max_concurrency: Upper bound on in-flight requests.
+        :return: Recommendation strings in the same order as the requests.
+        """
+        if not request_triples:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(request_triples))) as pool:
+            futures = [pool.submit(self.get_overclock_recommendations, *triple)
+                       for triple in request_triples]
+            return [future.result() for future in futures]
+
+    def stream_overclock_recommendations(self, system_summary: str, current_mining_algorithm: str, user_goal: str):
+        """
+        Sends a detailed prompt to the LLM and yields the recommendation incrementally
+        as it is generated, so callers can render text long before the final token.
+        :param system_summary: A string containing the system's static and real-time metrics.
+        :param current_mining_algorithm: The cryptocurrency mining algorithm being used.
+        :param user_goal: The user's primary goal for optimization (e.g., "maximize efficiency").
+        :return: A generator of response text fragments (or a single error message).
+        """
+        prompt = "".join((
+            "The user's primary goal for overclocking is: '", user_goal, "'.\n",
+            "The current crypto mining algorithm they are using (or plan to use) is: '", current_mining_algorithm, "'.\n",
+            "\nHere is the current system summary and real-time telemetry:\n",
+            system_summary,
+        ))
+        # --- LLM API Call ---
+        cache_path = self._response_cache_path(system_summary, current_mining_algorithm, user_goal)
+        try:
+            if os.path.exists(cache_path):
+                print(f"[LLM] Serving cached recommendation ({os.path.basename(cache_path)}).")
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    yield f.read()
+                return
+        except Exception as e:
+            print(f"[LLM] Cache read failed ({e}); falling back to inference.")
+
+        fragments = []
+        try:
+            print(f"\n[LLM] Sending prompt to LLM for recommendations ({self.llm_model})...")
+            # Streaming either way: fragments arrive as they are decoded, so
+            # total wall time is unchanged but perceived latency drops a lot.
+            if self.backend == "llamacpp":
+                parts = self._stream_llamacpp_fragments(prompt)
+            else:
+                # For more advanced conversational flows, ollama.chat can be used
+                parts = (part.get('response', '') for part in self.ollama_client.generate(
+                    model=self.llm_model,
+                    prompt=prompt,
+                    system=_SYSTEM_PROMPT, # Byte-identical every call, so its prefill KV cache is reused
+                    stream=True,
+                    keep_alive=self.keep_alive,
+                    options={
+                        "temperature": self.temperature, # Controls randomness: lower for more factual, higher for more creative
+                        "num_predict": self.num_predict, # Cap response length so latency stays bounded
+                        "num_ctx": self._estimate_num_ctx(_SYSTEM_PROMPT + prompt), # Size the KV cache to the request, not a fixed 4096
+                        "top_k": 40,
+                        "top_p": 0.9,
+                        "num_gpu": -1 # Use all available GPU layers if model is GPU-accelerated
+                    }
+                ))
+            for fragment in parts:
+                fragments.append(fragment)
+                yield fragment
+
+            # Write-through once the full response streamed successfully
+            try:
+                with open(cache_path, 'w', encoding='utf-8') as f:
+                    f.write("".join(fragments))
+            except Exception as e:
+                print(f"[LLM] Cache write failed ({e}).")
+
+        except Exception as e:
+            error_message = f"Error: Could not get recommendations from LLM. Details: {e}\n"
+            if "status code: 404" in str(e) and self.llm_model in str(e):
+                error_message += f"Please ensure the model '{self.llm_model}' is downloaded and available in your Ollama installation. Run `ollama pull {self.llm_model}` in your terminal."
+            else:
+                error_message += "Please ensure your Ollama server is running and accessible (e.g., at http://localhost:11434)."
+            
+            print(f"[LLM ERROR] {error_message}")
+            yield error_message
+
+# Example Usage (for independent testing)
+if __name__ == "__main__":
+    mock_config = {
+        "llm_model_name": "llama3", # Make sure you have 'llama3' pulled in Ollama
+        "ollama_base_url": "http://localhost:11434"
+    }
+
+    llm_advisor = LLMInterface(mock_config)
+
+    # Mock system summary (replace with real data from SystemMonitor)
+    mock_system_summary = """
+    System Summary:
+    ---
+    GPU (Brand: NVIDIA):
+      Model: NVIDIA GeForce RTX 3070
+      Driver Version: 535.12.0
+      Total VRAM: 8192 MB
+      Current Temp: 65°C
+      Current Hot Spot Temp: 75°C
+      Current Power Draw: 220W
+      Current Core Clock: 1800MHz
+      Current Memory Clock: 7000MHz
+      Current Fan Speed: 60%
+      Current VRAM Used: 7800 MB
+
+    CPU:
+      Temperature: 50°C
+      Usage: 10%
+
+    RAM:
+      Total: 32 GB
+      Used: 10 GB (31%)
+
+    Operating System: Linux
+    """
+
+    mock_current_mining_algorithm = "Ethash" # Example: Ethereum Classic mining
+    mock_user_goal = "Maximize power efficiency while maintaining stability and extending GPU lifespan."
+
+    print("\nAttempting to get LLM recommendations (this might take a while)...")
+    recommendations = llm_advisor.get_overclock_recommendations(
+        mock_system_summary,
+        mock_current_mining_algorithm,
+        mock_user_goal
+    )
+    print("\n--- LLM Recommendations ---")
+    print(recommendations)
+    print("--------------------------")
@@ -1,257 +1,713 @@
-import platform
-import subprocess
-import json
-import psutil
-import time
-from datetime import datetime
-
-# Import pynvml for NVIDIA GPUs if available
-try:
-    import pynvml
-    NVIDIA_NVML_AVAILABLE = True
-except ImportError:
-    NVIDIA_NVML_AVAILABLE = False
-except Exception as e:
-    print(f"Warning: Could not import or initialize pynvml (NVIDIA GPU monitoring). Error: {e}. NVIDIA monitoring will be disabled.")
-    NVIDIA_NVML_AVAILABLE = False
-
-class SystemMonitor:
-    """
-    Monitors system hardware components, including GPU, CPU, and RAM.
-    Supports NVIDIA GPUs via pynvml and provides placeholders/subprocess for AMD/general CPU metrics.
-    """
-    def __init__(self, gpu_brand: str):
-        """
-        Initializes the SystemMonitor.
-        :param gpu_brand: The brand of the GPU ("NVIDIA" or "AMD").
-                          Note: AMD support is rudimentary and platform-dependent.
-        """
-        self.gpu_brand = gpu_brand.upper()
-        self.os = platform.system()
-        self.gpu_static_info = self._get_gpu_static_info()
-
-    def _get_gpu_static_info(self) -> dict:
-        """
-        Attempts to get static GPU information (model, VRAM, driver version).
-        Returns a dictionary with GPU info.
-        """
-        info = {"model": "Unknown", "vram_total_mb": "Unknown", "driver_version": "Unknown"}
-
-        if self.gpu_brand == "NVIDIA" and NVIDIA_NVML_AVAILABLE:
-            try:
-                pynvml.nvmlInit()
-                handle = pynvml.nvmlDeviceGetHandleByIndex(0) # Assuming single GPU for simplicity
-                info["model"] = pynvml.nvmlDeviceGetName(handle)
-                mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
-                info["vram_total_mb"] = mem_info.total // (1024 * 1024) # Bytes to MB
-                info["driver_version"] = pynvml.nvmlSystemGetDriverVersion()
-            except pynvml.NVMLError as error:
-                print(f"NVIDIA NVML Static Info Error: {error}. Check NVIDIA driver installation.")
-            except Exception as e: # Catch any other unexpected errors during static info gathering
-                print(f"Unexpected error getting NVIDIA static info: {e}")
-            finally:
-                try:
-                    pynvml.nvmlShutdown()
-                except pynvml.NVMLError_Uninitialized:
-                    pass # Already shutdown or never initialized
-
-        elif self.gpu_brand == "AMD":
-            # AMD GPU static info is highly dependent on OS and specific AMD tools.
-            # On Linux, 'amdgpu_top --json' can provide some details.
-            if self.os == "Linux":
-                try:
-                    result = subprocess.run(['amdgpu_top', '--json'], capture_output=True, text=True, check=False)
-                    if result.returncode == 0:
-                        data = json.loads(result.stdout)
-                        if data and 'cards' in data and len(data['cards']) > 0:
-                            card = data['cards'][0]
-                            info["model"] = card.get("name", "AMD GPU (via amdgpu_top)")
-                            info["vram_total_mb"] = card.get("vbios", {}).get("vram_size", "Unknown") # May vary
-                            info["driver_version"] = "Check system info (Linux)"
-                    else:
-                        print(f"amdgpu_top error (static info): {result.stderr}")
-                except FileNotFoundError:
-                    print("amdgpu_top not found. Install it for better AMD GPU detection on Linux.")
-                except json.JSONDecodeError:
-                    print("Could not parse amdgpu_top JSON output for static info.")
-                except Exception as e:
-                    print(f"Error getting AMD GPU static info: {e}")
-            else:
-                print("Automated AMD GPU static info on Windows is challenging without vendor SDKs.")
-        
-        return info
-
-    def get_realtime_metrics(self) -> dict:
-        """
-        Gathers real-time GPU, CPU, and RAM metrics.
-        Returns a dictionary with current metric values.
-        """
-        metrics = {
-            "timestamp": datetime.now().isoformat(),
-            "gpu": {
-                "temp_celsius": "N/A",
-                "hotspot_temp_celsius": "N/A",
-                "power_draw_watts": "N/A",
-                "core_clock_mhz": "N/A",
-                "memory_clock_mhz": "N/A",
-                "fan_speed_percent": "N/A",
-                "vram_used_mb": "N/A",
-                "hash_rate_mhps": "N/A", # Placeholder: to be filled by parsing miner logs or user input
-                "efficiency_jpmh": "N/A" # Placeholder: calculated if hash_rate and power_draw are available
-            },
-            "cpu": {
-                "temperature_celsius": "N/A",
-                "usage_percent": "N/A"
-            },
-            "ram": {
-                "total_gb": round(psutil.virtual_memory().total / (1024**3), 2),
-                "used_gb": round(psutil.virtual_memory().used / (1024**3), 2),
-                "usage_percent": psutil.virtual_memory().percent
-            }
-        }
-
-        # --- GPU Metrics ---
-        if self.gpu_brand == "NVIDIA" and NVIDIA_NVML_AVAILABLE:
-            try:
-                pynvml.nvmlInit()
-                handle = pynvml.nvmlDeviceGetHandleByIndex(0) # Assuming first GPU
-
-                # Guard specific NVML attribute access
-                if hasattr(pynvml, 'NVML_TEMP_GPU'):
-                    metrics["gpu"]["temp_celsius"] = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMP_GPU)
-                else:
-                    metrics["gpu"]["temp_celsius"] = "N/A (NVML_TEMP_GPU not found)"
-
-                if hasattr(pynvml, 'NVML_TEMP_GPU_MEM'):
-                    try:
-                        metrics["gpu"]["hotspot_temp_celsius"] = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMP_GPU_MEM)
-                    except pynvml.NVMLError_NotSupported:
-                        metrics["gpu"]["hotspot_temp_celsius"] = "N/A (Not Supported)"
-                else:
-                    metrics["gpu"]["hotspot_temp_celsius"] = "N/A (NVML_TEMP_GPU_MEM not found)"
-
-                metrics["gpu"]["power_draw_watts"] = pynvml.nvmlDeviceGetPowerUsage(handle) / 1000.0
-                
-                # Corrected nvmlDeviceGetClockInfo calls: removed third argument
-                graphics_clock = "N/A"
-                if hasattr(pynvml, 'NVML_CLOCK_GRAPHICS'):
-                    try:
-                        graphics_clock = pynvml.nvmlDeviceGetClockInfo(handle, pynvml.NVML_CLOCK_GRAPHICS)
-                    except pynvml.NVMLError_NotSupported:
-                        graphics_clock = "N/A (Not Supported)"
-                metrics["gpu"]["core_clock_mhz"] = graphics_clock
-
-                memory_clock = "N/A"
-                if hasattr(pynvml, 'NVML_CLOCK_MEM'):
-                    try:
-                        memory_clock = pynvml.nvmlDeviceGetClockInfo(handle, pynvml.NVML_CLOCK_MEM)
-                    except pynvml.NVMLError_NotSupported:
-                        memory_clock = "N/A (Not Supported)"
-                metrics["gpu"]["memory_clock_mhz"] = memory_clock
-
-                try:
-                    metrics["gpu"]["fan_speed_percent"] = pynvml.nvmlDeviceGetFanSpeed(handle)
-                except pynvml.NVMLError_NotSupported:
-                    metrics["gpu"]["fan_speed_percent"] = "N/A (Not Supported)"
-
-                mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
-                metrics["gpu"]["vram_used_mb"] = mem_info.used // (1024 * 1024)
-
-            except pynvml.NVMLError as error:
-                print(f"NVIDIA NVML Runtime Error: {error}. Check if NVIDIA driver is loaded.")
-            except Exception as e: # Catch any other unexpected errors during NVIDIA metric gathering
-                print(f"Unexpected error getting NVIDIA real-time metrics: {e}")
-            finally:
-                try:
-                    pynvml.nvmlShutdown()
-                except pynvml.NVMLError_Uninitialized:
-                    pass
-
-        elif self.gpu_brand == "AMD" and self.os == "Linux":
-            # Placeholder for AMD Linux using amdgpu_top via subprocess
-            try:
-                result = subprocess.run(['amdgpu_top', '--json'], capture_output=True, text=True, check=False)
-                if result.returncode == 0:
-                    data = json.loads(result.stdout)
-                    if data and 'cards' in data and len(data['cards']) > 0:
-                        card = data['cards'][0]
-                        metrics["gpu"]["temp_celsius"] = card.get("temp", {}).get("edge", "N/A")
-                        metrics["gpu"]["hotspot_temp_celsius"] = card.get("temp", {}).get("junction", "N/A")
-                        metrics["gpu"]["power_draw_watts"] = card.get("power_average", "N/A") / 1000.0 if isinstance(card.get("power_average"), (int, float)) else "N/A"
-                        metrics["gpu"]["core_clock_mhz"] = card.get("gfx_clk_freq", "N/A") / 1000000.0 if isinstance(card.get("gfx_clk_freq"), (int, float)) else "N/A"
-                        metrics["gpu"]["memory_clock_mhz"] = card.get("mem_clk_freq", "N/A") / 1000000.0 if isinstance(card.get("mem_clk_freq"), (int, float)) else "N/A"
-                        metrics["gpu"]["fan_speed_percent"] = card.get("fan_speed_percent", "N/A")
-                        metrics["gpu"]["vram_used_mb"] = card.get("vram_used", "N/A")
-                else:
-                    print(f"amdgpu_top error (realtime info): {result.stderr}")
-            except FileNotFoundError:
-                print("amdgpu_top not found. Install it for better AMD GPU monitoring on Linux.")
-            except json.JSONDecodeError:
-                print("Could not parse amdgpu_top JSON output for real-time info.")
-            except Exception as e:
-                print(f"Error getting AMD GPU real-time metrics: {e}")
-        else:
-            # Fallback or message for unsupported AMD/Windows cases
-            pass
-
-        # --- CPU Metrics ---
-        metrics["cpu"]["usage_percent"] = psutil.cpu_percent(interval=None) # Non-blocking
-
-        # CPU Temperature (platform-dependent)
-        if hasattr(psutil, "sensors_temperatures"):
-            temps = psutil.sensors_temperatures()
-            if 'coretemp' in temps:
-                metrics["cpu"]["temperature_celsius"] = temps['coretemp'][0].current
-            elif 'k10temp' in temps:
-                metrics["cpu"]["temperature_celsius"] = temps['k10temp'][0].current
-            elif 'cpu_thermal' in temps:
-                 metrics["cpu"]["temperature_celsius"] = temps['cpu_thermal'][0].current
-
-        return metrics
-
-    def get_system_summary_string(self, realtime_metrics: dict) -> str:
-        """
-        Formats the static and real-time info into a string for the LLM prompt.
-        :param realtime_metrics: The dictionary of real-time metrics.
-        :return: A formatted string summary.
-        """
-        static_info = self.gpu_static_info
-        summary = f"""
-System Summary:
----
-GPU (Brand: {self.gpu_brand}):
-  Model: {static_info['model']}
-  Driver Version: {static_info['driver_version']}
-  Total VRAM: {static_info['vram_total_mb']} MB
-  Current Temp: {realtime_metrics['gpu']['temp_celsius']}°C
-  Current Hot Spot Temp: {realtime_metrics['gpu']['hotspot_temp_celsius']}°C
-  Current Power Draw: {realtime_metrics['gpu']['power_draw_watts']}W
-  Current Core Clock: {realtime_metrics['gpu']['core_clock_mhz']}MHz
-  Current Memory Clock: {realtime_metrics['gpu']['memory_clock_mhz']}MHz
-  Current Fan Speed: {realtime_metrics['gpu']['fan_speed_percent']}%
-  Current VRAM Used: {realtime_metrics['gpu']['vram_used_mb']} MB
-
-CPU:
-  Temperature: {realtime_metrics['cpu']['temperature_celsius']}°C
-  Usage: {realtime_metrics['cpu']['usage_percent']}%
-
-RAM:
-  Total: {realtime_metrics['ram']['total_gb']} GB
-  Used: {realtime_metrics['ram']['used_gb']} GB ({realtime_metrics['ram']['usage_percent']}%)
-
-Operating System: {self.os}
-"""
-        return summary
-
-# Example Usage (for independent testing)
-if __name__ == "__main__":
-    # IMPORTANT: Set your GPU brand here for testing
-    monitor = SystemMonitor(gpu_brand="NVIDIA") 
-    print("Static GPU Info:", monitor.gpu_static_info)
-
-    print("\nReal-time Metrics (Looping for 3 samples):")
-    for _ in range(3):
-        metrics = monitor.get_realtime_metrics()
-        print(monitor.get_system_summary_string(metrics))
-        print("-" * 30)
-        time.sleep(2) # Shorter interval for testing
+import atexit
+import ctypes
+import glob
+import os
+import platform
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import json
+import psutil
+import time
+from datetime import datetime
+
+# orjson parses the amdgpu_top payloads 2-4x faster than stdlib json; fall
+# back silently since it only affects parse speed, not behavior
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# NumPy is optional: history buffers and derived stats are skipped without it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Import pynvml for NVIDIA GPUs if available
+try:
+    import pynvml
+    NVIDIA_NVML_AVAILABLE = True
+except ImportError:
+    NVIDIA_NVML_AVAILABLE = False
+except Exception as e:
+    print(f"Warning: Could not import or initialize pynvml (NVIDIA GPU monitoring). Error: {e}. NVIDIA monitoring will be disabled.")
+    NVIDIA_NVML_AVAILABLE = False
+
+# Compiled once at import; get_system_summary_string only substitutes values
+# into it per call instead of rebuilding the multi-line literal each time
+_SUMMARY_TEMPLATE = """
+System Summary:
+---
+GPU (Brand: {gpu_brand}):
+  Model: {model}
+  Driver Version: {driver_version}
+  Total VRAM: {vram_total_mb} MB
+  Current Temp: {temp_celsius}°C
+  Current Hot Spot Temp: {hotspot_temp_celsius}°C
+  Current Power Draw: {power_draw_watts}W
+  Current Core Clock: {core_clock_mhz}MHz
+  Current Memory Clock: {memory_clock_mhz}MHz
+  Current Fan Speed: {fan_speed_percent}%
+  Current VRAM Used: {vram_used_mb} MB
+
+CPU:
+  Temperature: {cpu_temperature_celsius}°C
+  Usage: {cpu_usage_percent}%
+
+RAM:
+  Total: {ram_total_gb} GB
+  Used: {ram_used_gb} GB ({ram_usage_percent}%)
+
+Operating System: {os}
+"""
+
+class SystemMonitor:
+    """
+    Monitors system hardware components, including GPU, CPU, and RAM.
+    Supports NVIDIA GPUs via pynvml and provides placeholders/subprocess for AMD/general CPU metrics.
+    """
+    def __init__(self, gpu_brand: str):
+        """
+        Initializes the SystemMonitor.
+        :param gpu_brand: The brand of the GPU ("NVIDIA" or "AMD").
+                          Note: AMD support is rudimentary and platform-dependent.
+        """
+        self.gpu_brand = gpu_brand.upper()
+        self.os = platform.system()
+        # Initialize NVML once and keep the device handle for the monitor's
+        # lifetime; an init/handle-lookup/shutdown cycle per sample costs
+        # milliseconds of driver calls every interval. close() shuts NVML down.
+        self._handle = None
+        self._field_ids = []
+        self._field_targets = {} # field id -> (metrics["gpu"] key, scale factor)
+        self._gpm_samples = None # Reusable (baseline, current) GPM sample buffers, Hopper+ only
+        # Per-sensor support flags, probed once at the end of NVML setup so the
+        # steady-state poll never takes an exception for a sensor that simply
+        # isn't there (repeated NVMLError_NotSupported is pure wasted work)
+        self._supports_memtemp = False
+        self._supports_gfx_clk = False
+        self._supports_mem_clk = False
+        self._supports_fan = False
+        # NVML enum ids are constant for the process lifetime; resolve them once
+        # so the poll loop does no hasattr introspection per sample
+        self._nvml_temp_id = getattr(pynvml, 'NVML_TEMP_GPU', None) if NVIDIA_NVML_AVAILABLE else None
+        self._nvml_memtemp_id = getattr(pynvml, 'NVML_TEMP_GPU_MEM', None) if NVIDIA_NVML_AVAILABLE else None
+        self._nvml_gfx_clk_id = getattr(pynvml, 'NVML_CLOCK_GRAPHICS', None) if NVIDIA_NVML_AVAILABLE else None
+        self._nvml_mem_clk_id = getattr(pynvml, 'NVML_CLOCK_MEM', None) if NVIDIA_NVML_AVAILABLE else None
+        # Linux: aggregate CPU usage comes from the first line of /proc/stat via
+        # a persistent handle; psutil's generic path re-reads and scans every
+        # per-core line each call, which adds up at sub-second polling.
+        self._stat_fh = None
+        self._prev_cpu_times = None # (idle, total) jiffies from the previous poll
+        if self.os == "Linux":
+            try:
+                self._stat_fh = open('/proc/stat', 'rb')
+            except OSError:
+                self._stat_fh = None # procfs unavailable; psutil path still works
+        # Likewise probe which psutil temperature sensor this host exposes once
+        self._cpu_temp_key = None
+        if hasattr(psutil, "sensors_temperatures"):
+            try:
+                temps = psutil.sensors_temperatures()
+                for sensor_key in ('coretemp', 'k10temp', 'cpu_thermal'):
+                    if sensor_key in temps:
+                        self._cpu_temp_key = sensor_key
+                        break
+            except Exception as e:
+                print(f"Could not probe CPU temperature sensors: {e}")
+        # AMD on Linux: resolve the sysfs hwmon directory once so each poll is a
+        # handful of small file reads instead of forking amdgpu_top and parsing
+        # its JSON (process spawn alone costs tens of milliseconds per sample).
+        self._amd_device_dir = "/sys/class/drm/card0/device"
+        self._amd_hwmon_dir = None
+        self._amdgpu_proc = None # Long-lived amdgpu_top stream, only without hwmon
+        self._amdgpu_latest = None # Newest parsed object from that stream
+        if self.gpu_brand == "AMD" and self.os == "Linux":
+            hwmon_dirs = glob.glob(os.path.join(self._amd_device_dir, "hwmon", "hwmon*"))
+            if hwmon_dirs:
+                self._amd_hwmon_dir = hwmon_dirs[0]
+            else:
+                # No hwmon: keep one amdgpu_top running in loop mode and read its
+                # stdout stream — a single fork for the process lifetime instead
+                # of a fresh spawn (tens of milliseconds) every sample
+                try:
+                    self._amdgpu_proc = subprocess.Popen(
+                        ['amdgpu_top', '-J', '-s', '500'],
+                        stdout=subprocess.PIPE, text=True
+                    )
+                    threading.Thread(target=self._consume_amdgpu_stream, daemon=True).start()
+                except (FileNotFoundError, OSError):
+                    self._amdgpu_proc = None
+                    print("AMD sysfs hwmon and amdgpu_top both unavailable; GPU metrics disabled.")
+        # GPU and CPU/RAM polls are independent driver/sysfs reads; running them
+        # on two workers hides one poll's latency behind the other's
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="monitor")
+        # Latest completed sample; a plain reference swap is atomic in CPython,
+        # so readers on other threads get a consistent snapshot without locking
+        self._latest = None
+        # Placeholder leaves built once; each poll takes C-level dict() copies of
+        # these instead of re-evaluating ~20 key/value literal pairs per sample.
+        # (Samples are published as immutable snapshots, so the template itself
+        # is never handed out or mutated in place.)
+        self._gpu_template = {
+            "temp_celsius": "N/A",
+            "hotspot_temp_celsius": "N/A",
+            "power_draw_watts": "N/A",
+            "core_clock_mhz": "N/A",
+            "memory_clock_mhz": "N/A",
+            "fan_speed_percent": "N/A",
+            "vram_used_mb": "N/A",
+            "hash_rate_mhps": "N/A", # Placeholder: to be filled by parsing miner logs or user input
+            "efficiency_jpmh": "N/A" # Placeholder: calculated if hash_rate and power_draw are available
+        }
+        self._cpu_template = {
+            "temperature_celsius": "N/A",
+            "usage_percent": "N/A"
+        }
+        self._ram_template = {
+            "total_gb": "N/A",
+            "used_gb": "N/A",
+            "usage_percent": "N/A"
+        }
+        # Ring buffer of recent numeric GPU samples so derived stats run as one
+        # NumPy kernel over the whole window instead of per-sample Python math
+        self._history = None
+        self._history_pos = 0
+        self._history_count = 0
+        if NUMPY_AVAILABLE:
+            self._history = np.full(
+                (self._HISTORY_CAPACITY, len(self._HISTORY_COLUMNS)), np.nan, dtype=np.float32
+            )
+        if self.gpu_brand == "NVIDIA" and NVIDIA_NVML_AVAILABLE:
+            try:
+                pynvml.nvmlInit()
+                self._handle = pynvml.nvmlDeviceGetHandleByIndex(0) # Assuming single GPU for simplicity
+                atexit.register(self.close) # Safety net if the app exits without calling close()
+            except pynvml.NVMLError as error:
+                print(f"NVIDIA NVML Init Error: {error}. Check NVIDIA driver installation.")
+            # Bind libnvidia-ml directly for the hot scalar reads: pynvml wraps
+            # every call in a Python function that allocates a fresh out-param
+            # and builds an exception on non-success. Calling the shared library
+            # with one preallocated c_uint skips that per-call overhead for the
+            # ~6 scalar reads every sample; anything else stays on pynvml.
+            self._nvml_lib = None
+            self._nvml_out_uint = ctypes.c_uint(0)
+            if self._handle is not None:
+                try:
+                    lib_name = "nvml.dll" if self.os == "Windows" else "libnvidia-ml.so.1"
+                    self._nvml_lib = ctypes.CDLL(lib_name)
+                except OSError:
+                    self._nvml_lib = None # Library not loadable directly; pynvml still works
+            # Resolve once which metrics this pynvml build can serve through
+            # nvmlDeviceGetFieldValues: those are then fetched in a single
+            # driver call per sample instead of one ioctl per metric. Anything
+            # without a field id keeps its individual legacy call below.
+            if self._handle is not None and hasattr(pynvml, 'nvmlDeviceGetFieldValues'):
+                for attr, key, scale in (
+                    ("NVML_FI_DEV_POWER_INSTANT", "power_draw_watts", 0.001), # mW -> W
+                    ("NVML_FI_DEV_MEMORY_TEMP", "hotspot_temp_celsius", 1),
+                ):
+                    field_id = getattr(pynvml, attr, None)
+                    if field_id is not None:
+                        self._field_ids.append(field_id)
+                        self._field_targets[field_id] = (key, scale)
+            # GPM (Hopper and newer) reports SM/tensor/DRAM utilization as deltas
+            # between two samples; allocate the two buffers once and reuse them
+            # every poll instead of alloc/free churn per sample.
+            if self._handle is not None and hasattr(pynvml, 'nvmlGpmQueryDeviceSupport'):
+                try:
+                    if pynvml.nvmlGpmQueryDeviceSupport(self._handle).isSupportedDevice:
+                        self._gpm_samples = [pynvml.nvmlGpmSampleAlloc(), pynvml.nvmlGpmSampleAlloc()]
+                        pynvml.nvmlGpmSampleGet(self._handle, self._gpm_samples[0]) # Baseline for the first poll
+                except pynvml.NVMLError:
+                    self._gpm_samples = None # Pre-Hopper GPU or older driver; GPM metrics stay absent
+            # One probing read per optional sensor; the poll loop then branches
+            # on plain booleans instead of catching NotSupported every sample
+            if self._handle is not None:
+                self._supports_memtemp = (self._nvml_memtemp_id is not None and self._read_gpu_uint(
+                    "nvmlDeviceGetTemperature", pynvml.nvmlDeviceGetTemperature, self._nvml_memtemp_id) is not None)
+                self._supports_gfx_clk = (self._nvml_gfx_clk_id is not None and self._read_gpu_uint(
+                    "nvmlDeviceGetClockInfo", pynvml.nvmlDeviceGetClockInfo, self._nvml_gfx_clk_id) is not None)
+                self._supports_mem_clk = (self._nvml_mem_clk_id is not None and self._read_gpu_uint(
+                    "nvmlDeviceGetClockInfo", pynvml.nvmlDeviceGetClockInfo, self._nvml_mem_clk_id) is not None)
+                self._supports_fan = self._read_gpu_uint(
+                    "nvmlDeviceGetFanSpeed", pynvml.nvmlDeviceGetFanSpeed) is not None
+        self.gpu_static_info = self._get_gpu_static_info()
+
+    def close(self):
+        """Releases the NVML session and poll workers held since __init__. Call on application exit."""
+        self._pool.shutdown(wait=False)
+        if self._stat_fh is not None:
+            self._stat_fh.close()
+            self._stat_fh = None
+        if self._amdgpu_proc is not None:
+            self._amdgpu_proc.terminate()
+            self._amdgpu_proc = None
+        if self._handle is not None:
+            self._handle = None
+            if self._gpm_samples is not None:
+                for sample in self._gpm_samples:
+                    try:
+                        pynvml.nvmlGpmSampleFree(sample)
+                    except pynvml.NVMLError:
+                        pass
+                self._gpm_samples = None
+            try:
+                pynvml.nvmlShutdown()
+            except pynvml.NVMLError_Uninitialized:
+                pass # Already shutdown or never initialized
+
+    def _get_gpu_static_info(self) -> dict:
+        """
+        Attempts to get static GPU information (model, VRAM, driver version).
+        Returns a dictionary with GPU info.
+        """
+        info = {"model": "Unknown", "vram_total_mb": "Unknown", "driver_version": "Unknown"}
+
+        if self._handle is not None:
+            try:
+                handle = self._handle # Cached by __init__; NVML stays initialized
+                info["model"] = pynvml.nvmlDeviceGetName(handle)
+                mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
+                info["vram_total_mb"] = mem_info.total // (1024 * 1024) # Bytes to MB
+                info["driver_version"] = pynvml.nvmlSystemGetDriverVersion()
+            except pynvml.NVMLError as error:
+                print(f"NVIDIA NVML Static Info Error: {error}. Check NVIDIA driver installation.")
+            except Exception as e: # Catch any other unexpected errors during static info gathering
+                print(f"Unexpected error getting NVIDIA static info: {e}")
+
+        elif self.gpu_brand == "AMD":
+            # AMD GPU static info is highly dependent on OS and specific AMD tools.
+            # On Linux, 'amdgpu_top --json' can provide some details.
+            if self.os == "Linux":
+                try:
+                    result = subprocess.run(['amdgpu_top', '--json'], capture_output=True, text=True, check=False)
+                    if result.returncode == 0:
+                        data = _json_loads(result.stdout)
+                        if data and 'cards' in data and len(data['cards']) > 0:
+                            card = data['cards'][0]
+                            info["model"] = card.get("name", "AMD GPU (via amdgpu_top)")
+                            info["vram_total_mb"] = card.get("vbios", {}).get("vram_size", "Unknown") # May vary
+                            info["driver_version"] = "Check system info (Linux)"
+                    else:
+                        print(f"amdgpu_top error (static info): {result.stderr}")
+                except FileNotFoundError:
+                    print("amdgpu_top not found. Install it for better AMD GPU detection on Linux.")
+                except ValueError:
+                    print("Could not parse amdgpu_top JSON output for static info.")
+                except Exception as e:
+                    print(f"Error getting AMD GPU static info: {e}")
+            else:
+                print("Automated AMD GPU static info on Windows is challenging without vendor SDKs.")
+        
+        return info
+
+    # Which union member of an NVML field value holds the data, by valueType
+    _FIELD_VALUE_MEMBERS = {0: "dVal", 1: "uiVal", 2: "ulVal", 3: "ullVal", 4: "sllVal", 5: "siVal"}
+
+    def _query_field_values(self, handle, gpu_metrics: dict) -> set:
+        """
+        Fetches every metric with a resolved NVML field id in one
+        nvmlDeviceGetFieldValues call and writes the results into gpu_metrics.
+        :param handle: The cached NVML device handle.
+        :param gpu_metrics: The metrics["gpu"] dict to populate.
+        :return: The set of metric keys the batch successfully filled.
+        """
+        filled = set()
+        if not self._field_ids:
+            return filled
+        try:
+            for fv in pynvml.nvmlDeviceGetFieldValues(handle, self._field_ids):
+                if fv.nvmlReturn != 0: # Field unsupported on this GPU/driver
+                    continue
+                member = self._FIELD_VALUE_MEMBERS.get(fv.valueType)
+                if member is None:
+                    continue
+                key, scale = self._field_targets[fv.fieldId]
+                gpu_metrics[key] = getattr(fv.value, member) * scale
+                filled.add(key)
+        except pynvml.NVMLError as error:
+            print(f"NVIDIA NVML field-value batch error: {error}. Falling back to per-metric calls.")
+        return filled
+
+    # GPM metric ids (resolved lazily; absent on older pynvml builds) and the
+    # metrics["gpu"] keys they populate
+    _GPM_METRICS = (
+        ("NVML_GPM_METRIC_SM_UTIL", "sm_active_pct"),
+        ("NVML_GPM_METRIC_SM_OCCUPANCY", "sm_occupancy_pct"),
+        ("NVML_GPM_METRIC_ANY_TENSOR_UTIL", "tensor_active_pct"),
+        ("NVML_GPM_METRIC_DRAM_BW_UTIL", "dram_active_pct"),
+    )
+
+    def _collect_gpm_metrics(self, handle, gpu_metrics: dict):
+        """
+        Populates SM/tensor/DRAM utilization from GPM on supported GPUs. Computes
+        this poll's metrics against the previous poll's sample, then swaps the two
+        reused buffers so the current sample becomes the next baseline.
+        :param handle: The cached NVML device handle.
+        :param gpu_metrics: The metrics["gpu"] dict to populate.
+        """
+        if self._gpm_samples is None:
+            return
+        try:
+            baseline, current = self._gpm_samples
+            pynvml.nvmlGpmSampleGet(handle, current)
+            wanted = [(getattr(pynvml, name), key)
+                      for name, key in self._GPM_METRICS if hasattr(pynvml, name)]
+            if not wanted:
+                return
+            metrics_get = pynvml.c_nvmlGpmMetricsGet_t()
+            metrics_get.version = pynvml.NVML_GPM_METRICS_GET_VERSION
+            metrics_get.numMetrics = len(wanted)
+            metrics_get.sample1 = baseline
+            metrics_get.sample2 = current
+            for i, (metric_id, _) in enumerate(wanted):
+                metrics_get.metrics[i].metricId = metric_id
+            pynvml.nvmlGpmMetricsGet(metrics_get)
+            for i, (_, key) in enumerate(wanted):
+                if metrics_get.metrics[i].nvmlReturn == 0:
+                    gpu_metrics[key] = round(metrics_get.metrics[i].value, 1)
+            self._gpm_samples = [current, baseline] # Swap buffers for the next poll
+        except (pynvml.NVMLError, AttributeError) as e:
+            print(f"NVIDIA GPM metrics error: {e}. Disabling GPM sampling.")
+            self._gpm_samples = None
+
+    def _read_gpu_uint(self, direct_name: str, wrapper_func, *args):
+        """
+        Reads one unsigned NVML scalar for the cached handle, preferring the
+        direct ctypes binding (no wrapper frame, no out-param allocation) and
+        falling back to the pynvml wrapper when the symbol is unavailable.
+        :param direct_name: NVML C entry point name, e.g. "nvmlDeviceGetFanSpeed".
+        :param wrapper_func: The equivalent pynvml function.
+        :return: The value, or None when the read is unsupported.
+        """
+        if self._nvml_lib is not None:
+            try:
+                func = getattr(self._nvml_lib, direct_name)
+                if func(self._handle, *args, ctypes.byref(self._nvml_out_uint)) == 0:
+                    return self._nvml_out_uint.value
+                return None # Non-zero NVML status: unsupported on this GPU/driver
+            except AttributeError:
+                pass # Symbol missing from this library build; use the wrapper
+        try:
+            return wrapper_func(self._handle, *args)
+        except pynvml.NVMLError:
+            return None
+
+    def get_realtime_metrics(self) -> dict:
+        """
+        Gathers real-time GPU, CPU, and RAM metrics.
+        Returns a dictionary with current metric values.
+        """
+        metrics = {
+            "timestamp": datetime.now().isoformat(),
+            "gpu": dict(self._gpu_template), # Shallow copies of flat templates built in __init__
+            "cpu": dict(self._cpu_template),
+            "ram": dict(self._ram_template)
+        }
+
+        # The two polls touch disjoint parts of the dict, so no lock is needed
+        wait((self._pool.submit(self._poll_gpu, metrics),
+              self._pool.submit(self._poll_cpu_ram, metrics)))
+        self._record_history(metrics["gpu"])
+        self._latest = metrics # Published only once fully built
+        return metrics
+
+    def get_latest_metrics(self) -> dict:
+        """
+        Returns the most recent completed sample without touching the hardware.
+        Intended for UI-thread callers that must never block on NVML/sysfs I/O;
+        falls back to a live poll only before the first sample exists.
+        :return: The latest metrics dictionary.
+        """
+        latest = self._latest
+        return latest if latest is not None else self.get_realtime_metrics()
+
+    def _poll_gpu(self, metrics: dict):
+        """Fills metrics["gpu"] from NVML or the AMD sysfs/amdgpu_top path."""
+        if self._handle is not None:
+            try:
+                handle = self._handle # Cached by __init__; no per-sample init/lookup
+
+                # One batched driver call for everything with a field id; the
+                # per-metric calls below are skipped for whatever it returned
+                batched = self._query_field_values(handle, metrics["gpu"])
+                self._collect_gpm_metrics(handle, metrics["gpu"])
+
+                # NVML enum ids were resolved once in __init__; scalar reads go
+                # through the direct ctypes binding when available
+                if self._nvml_temp_id is not None:
+                    temp = self._read_gpu_uint("nvmlDeviceGetTemperature", pynvml.nvmlDeviceGetTemperature, self._nvml_temp_id)
+                    metrics["gpu"]["temp_celsius"] = temp if temp is not None else "N/A (Not Supported)"
+                else:
+                    metrics["gpu"]["temp_celsius"] = "N/A (NVML_TEMP_GPU not found)"
+
+                if "hotspot_temp_celsius" not in batched:
+                    if self._supports_memtemp:
+                        hotspot = self._read_gpu_uint("nvmlDeviceGetTemperature", pynvml.nvmlDeviceGetTemperature, self._nvml_memtemp_id)
+                        metrics["gpu"]["hotspot_temp_celsius"] = hotspot if hotspot is not None else "N/A (Not Supported)"
+                    else:
+                        metrics["gpu"]["hotspot_temp_celsius"] = "N/A (Not Supported)"
+
+                if "power_draw_watts" not in batched:
+                    power_mw = self._read_gpu_uint("nvmlDeviceGetPowerUsage", pynvml.nvmlDeviceGetPowerUsage)
+                    if power_mw is not None:
+                        metrics["gpu"]["power_draw_watts"] = power_mw / 1000.0
+
+                # Corrected nvmlDeviceGetClockInfo calls: removed third argument
+                graphics_clock = "N/A (Not Supported)"
+                if self._supports_gfx_clk:
+                    clock = self._read_gpu_uint("nvmlDeviceGetClockInfo", pynvml.nvmlDeviceGetClockInfo, self._nvml_gfx_clk_id)
+                    graphics_clock = clock if clock is not None else "N/A (Not Supported)"
+                metrics["gpu"]["core_clock_mhz"] = graphics_clock
+
+                memory_clock = "N/A (Not Supported)"
+                if self._supports_mem_clk:
+                    clock = self._read_gpu_uint("nvmlDeviceGetClockInfo", pynvml.nvmlDeviceGetClockInfo, self._nvml_mem_clk_id)
+                    memory_clock = clock if clock is not None else "N/A (Not Supported)"
+                metrics["gpu"]["memory_clock_mhz"] = memory_clock
+
+                if self._supports_fan:
+                    fan = self._read_gpu_uint("nvmlDeviceGetFanSpeed", pynvml.nvmlDeviceGetFanSpeed)
+                    metrics["gpu"]["fan_speed_percent"] = fan if fan is not None else "N/A (Not Supported)"
+                else:
+                    metrics["gpu"]["fan_speed_percent"] = "N/A (Not Supported)"
+
+                mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
+                metrics["gpu"]["vram_used_mb"] = mem_info.used // (1024 * 1024)
+
+            except pynvml.NVMLError as error:
+                print(f"NVIDIA NVML Runtime Error: {error}. Check if NVIDIA driver is loaded.")
+            except Exception as e: # Catch any other unexpected errors during NVIDIA metric gathering
+                print(f"Unexpected error getting NVIDIA real-time metrics: {e}")
+
+        elif self.gpu_brand == "AMD" and self.os == "Linux" and self._amd_hwmon_dir is not None:
+            self._collect_amd_sysfs_metrics(metrics["gpu"])
+
+        elif self.gpu_brand == "AMD" and self.os == "Linux" and self._amdgpu_proc is not None:
+            # Fallback for kernels without the amdgpu hwmon interface: parse the
+            # newest refresh from the long-lived amdgpu_top stream (no fork here)
+            try:
+                data = self._amdgpu_latest
+                if data and 'cards' in data and len(data['cards']) > 0:
+                    card = data['cards'][0]
+                    metrics["gpu"]["temp_celsius"] = card.get("temp", {}).get("edge", "N/A")
+                    metrics["gpu"]["hotspot_temp_celsius"] = card.get("temp", {}).get("junction", "N/A")
+                    metrics["gpu"]["power_draw_watts"] = card.get("power_average", "N/A") / 1000.0 if isinstance(card.get("power_average"), (int, float)) else "N/A"
+                    metrics["gpu"]["core_clock_mhz"] = card.get("gfx_clk_freq", "N/A") / 1000000.0 if isinstance(card.get("gfx_clk_freq"), (int, float)) else "N/A"
+                    metrics["gpu"]["memory_clock_mhz"] = card.get("mem_clk_freq", "N/A") / 1000000.0 if isinstance(card.get("mem_clk_freq"), (int, float)) else "N/A"
+                    metrics["gpu"]["fan_speed_percent"] = card.get("fan_speed_percent", "N/A")
+                    metrics["gpu"]["vram_used_mb"] = card.get("vram_used", "N/A")
+            except Exception as e:
+                print(f"Error getting AMD GPU real-time metrics: {e}")
+        else:
+            # Fallback or message for unsupported AMD/Windows cases
+            pass
+
+    def _poll_cpu_ram(self, metrics: dict):
+        """Fills metrics["cpu"] and metrics["ram"] via psutil."""
+        vm = psutil.virtual_memory() # One sysinfo call for all three RAM fields
+        metrics["ram"]["total_gb"] = round(vm.total / (1024**3), 2)
+        metrics["ram"]["used_gb"] = round(vm.used / (1024**3), 2)
+        metrics["ram"]["usage_percent"] = vm.percent
+
+        if self._stat_fh is not None:
+            usage = self._cpu_percent_procfs()
+            metrics["cpu"]["usage_percent"] = usage if usage is not None else psutil.cpu_percent(interval=None)
+        else:
+            metrics["cpu"]["usage_percent"] = psutil.cpu_percent(interval=None) # Non-blocking
+
+        # CPU Temperature (sensor key probed once in __init__)
+        if self._cpu_temp_key is not None:
+            readings = psutil.sensors_temperatures().get(self._cpu_temp_key)
+            if readings:
+                metrics["cpu"]["temperature_celsius"] = readings[0].current
+
+    @staticmethod
+    def _read_sysfs_int(path: str):
+        """Reads a single integer sysfs value, or None if absent/unreadable."""
+        try:
+            with open(path) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _read_dpm_clock_mhz(path: str):
+        """Parses the '*'-marked active level out of a pp_dpm_sclk/mclk table."""
+        try:
+            with open(path) as f:
+                for line in f:
+                    if '*' not in line:
+                        continue
+                    value = line.split(':', 1)[1].strip().rstrip('*').strip()
+                    if value.lower().endswith('mhz'):
+                        value = value[:-3]
+                    return int(value)
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+    def _collect_amd_sysfs_metrics(self, gpu_metrics: dict):
+        """
+        Fills the AMD GPU metrics straight from the sysfs hwmon files amdgpu_top
+        itself reads — no subprocess fork, no JSON parse per sample.
+        :param gpu_metrics: The metrics["gpu"] dict to populate.
+        """
+        hwmon = self._amd_hwmon_dir
+        device = self._amd_device_dir
+
+        edge = self._read_sysfs_int(os.path.join(hwmon, "temp1_input"))
+        if edge is not None:
+            gpu_metrics["temp_celsius"] = edge / 1000.0 # Millidegrees C
+        junction = self._read_sysfs_int(os.path.join(hwmon, "temp2_input"))
+        if junction is not None:
+            gpu_metrics["hotspot_temp_celsius"] = junction / 1000.0
+        power = self._read_sysfs_int(os.path.join(hwmon, "power1_average"))
+        if power is not None:
+            gpu_metrics["power_draw_watts"] = power / 1000000.0 # Microwatts
+        pwm = self._read_sysfs_int(os.path.join(hwmon, "pwm1"))
+        if pwm is not None:
+            gpu_metrics["fan_speed_percent"] = round(pwm / 255 * 100) # pwm1 is 0-255
+
+        sclk = self._read_dpm_clock_mhz(os.path.join(device, "pp_dpm_sclk"))
+        if sclk is not None:
+            gpu_metrics["core_clock_mhz"] = sclk
+        mclk = self._read_dpm_clock_mhz(os.path.join(device, "pp_dpm_mclk"))
+        if mclk is not None:
+            gpu_metrics["memory_clock_mhz"] = mclk
+        vram_used = self._read_sysfs_int(os.path.join(device, "mem_info_vram_used"))
+        if vram_used is not None:
+            gpu_metrics["vram_used_mb"] = vram_used // (1024 * 1024) # Bytes
+
+    # History ring-buffer layout: capacity and the gpu-dict fields per column
+    _HISTORY_CAPACITY = 4096
+    _HISTORY_COLUMNS = ("power_draw_watts", "hash_rate_mhps", "temp_celsius",
+                        "core_clock_mhz", "memory_clock_mhz")
+
+    def _record_history(self, gpu_metrics: dict):
+        """Appends the numeric GPU fields of one sample to the ring buffer."""
+        if self._history is None:
+            return
+        row = self._history[self._history_pos]
+        for i, key in enumerate(self._HISTORY_COLUMNS):
+            value = gpu_metrics.get(key)
+            row[i] = value if isinstance(value, (int, float)) else np.nan # "N/A" -> NaN
+        self._history_pos = (self._history_pos + 1) % self._HISTORY_CAPACITY
+        self._history_count = min(self._history_count + 1, self._HISTORY_CAPACITY)
+
+    def get_history(self):
+        """
+        Returns the recorded samples oldest-first as an (n, columns) float32
+        array, or None when NumPy is unavailable or nothing was sampled yet.
+        """
+        if self._history is None or self._history_count == 0:
+            return None
+        if self._history_count < self._HISTORY_CAPACITY:
+            return self._history[:self._history_pos]
+        # Buffer has wrapped; stitch the two halves back into chronological order
+        return np.concatenate((self._history[self._history_pos:], self._history[:self._history_pos]))
+
+    def compute_efficiency_series(self, window: int = 0):
+        """
+        Computes J/MH (power draw / hash rate) across the whole history in one
+        vectorized divide; samples missing either field come out as NaN.
+        :param window: Optional rolling-mean width in samples (0 = raw series).
+        :return: A float32 array oldest-first, or None without history.
+        """
+        history = self.get_history()
+        if history is None:
+            return None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            efficiency = history[:, 0] / history[:, 1]
+        if window > 1 and len(efficiency) >= window:
+            efficiency = np.convolve(efficiency, np.full(window, 1.0 / window), mode='valid')
+        return efficiency
+
+    def suggested_kv_budget_mb(self, weights_mb: int = 4096, reserve_mb: int = 1024):
+        """
+        Estimates how much VRAM is left for an LLM's KV cache after the model
+        weights (Q4_K_M 8B is ~4GB) and a safety reserve for the desktop/driver.
+        :param weights_mb: Size of the model weights resident in VRAM, in MB.
+        :param reserve_mb: VRAM headroom to leave untouched, in MB.
+        :return: The budget in MB, or None when total VRAM is unknown.
+        """
+        vram_total = self.gpu_static_info.get("vram_total_mb")
+        if not isinstance(vram_total, (int, float)):
+            return None
+        return max(0, int(vram_total) - weights_mb - reserve_mb)
+
+    def _consume_amdgpu_stream(self):
+        """
+        Reads the long-lived amdgpu_top loop-mode stream on a daemon thread,
+        keeping only the newest successfully parsed refresh for the poll loop.
+        """
+        try:
+            for line in self._amdgpu_proc.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._amdgpu_latest = _json_loads(line)
+                except ValueError:
+                    continue # Partial or garbled refresh; keep the previous one
+        except (OSError, ValueError):
+            pass # Stream closed (shutdown or amdgpu_top exited)
+
+    def _cpu_percent_procfs(self):
+        """
+        Computes aggregate CPU usage from the delta of the "cpu" line of
+        /proc/stat against the previous poll, using the handle kept open since
+        __init__. Mirrors psutil's first-call behavior by returning 0.0 until a
+        baseline exists.
+        :return: Usage percent, or None when the read fails.
+        """
+        try:
+            self._stat_fh.seek(0)
+            times = [int(v) for v in self._stat_fh.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        total = sum(times)
+        idle = times[3] + (times[4] if len(times) > 4 else 0) # idle + iowait
+        prev = self._prev_cpu_times
+        self._prev_cpu_times = (idle, total)
+        if prev is None or total <= prev[1]:
+            return 0.0
+        total_delta = total - prev[1]
+        busy_delta = total_delta - (idle - prev[0])
+        return round(busy_delta / total_delta * 100, 1)
+
+    def get_system_summary_string(self, realtime_metrics: dict) -> str:
+        """
+        Formats the static and real-time info into a string for the LLM prompt.
+        :param realtime_metrics: The dictionary of real-time metrics.
+        :return: A formatted string summary.
+        """
+        values = dict(self.gpu_static_info)
+        values.update(realtime_metrics['gpu'])
+        values.update(
+            gpu_brand=self.gpu_brand,
+            os=self.os,
+            cpu_temperature_celsius=realtime_metrics['cpu']['temperature_celsius'],
+            cpu_usage_percent=realtime_metrics['cpu']['usage_percent'],
+            ram_total_gb=realtime_metrics['ram']['total_gb'],
+            ram_used_gb=realtime_metrics['ram']['used_gb'],
+            ram_usage_percent=realtime_metrics['ram']['usage_percent'],
+        )
+        return _SUMMARY_TEMPLATE.format_map(values)
+
+# Example Usage (for independent testing)
+if __name__ == "__main__":
+    # IMPORTANT: Set your GPU brand here for testing
+    monitor = SystemMonitor(gpu_brand="NVIDIA") 
+    print("Static GPU Info:", monitor.gpu_static_info)
+
+    print("\nReal-time Metrics (Looping for 3 samples):")
+    for _ in range(3):
+        metrics = monitor.get_realtime_metrics()
+        print(monitor.get_system_summary_string(metrics))
+        print("-" * 30)
+        time.sleep(2) # Shorter interval for testing